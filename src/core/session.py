@@ -3,9 +3,12 @@ import logging
 import os
 import uuid
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from fastapi import WebSocket
 
+if TYPE_CHECKING:
+    from .watcher import Watch
+
 logger = logging.getLogger(__name__)
 
 class Session:
@@ -18,6 +21,7 @@ class Session:
         self.environment_variables: Dict[str, str] = os.environ.copy()
         self.active_processes: Dict[str, asyncio.subprocess.Process] = {} # Maps command_id to process
         self.websocket: Optional[WebSocket] = None
+        self.watches: Dict[str, "Watch"] = {} # Maps watch_id to periodically re-run command
 
     def set_env_var(self, key: str, value: str):
         """Set an environment variable for the session."""
@@ -93,6 +97,12 @@ class SessionManager:
         """
         session = self.sessions.get(session_id)
         if session:
+            # Stop watches first so they don't spawn new processes while we terminate the active ones
+            for watch_id, watch in list(session.watches.items()):
+                logger.info(f"Stopping watch {watch_id} for session {session_id}.")
+                watch.stop()
+            session.watches.clear()
+
             # Iterate over a copy of the items to avoid modification issues while iterating
             for command_id, process in list(session.active_processes.items()):
                 try:
@@ -0,0 +1,237 @@
+import asyncio
+import difflib
+import itertools
+import logging
+import time
+import uuid
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .executor import CommandExecutor
+    from .session import Session
+
+logger = logging.getLogger(__name__)
+
+# Number of past outputs kept per watch so callers with an older cursor can still get a diff
+MAX_SNAPSHOTS = 16
+# Maximum number of watches running at the same time in a single session
+MAX_WATCHES_PER_SESSION = 8
+# Seconds between runs when the caller doesn't give an interval, and the smallest interval accepted
+DEFAULT_INTERVAL = 2.0
+MIN_INTERVAL = 0.1
+# Upper bound in seconds for a blocking poll, kept below common MCP client request timeouts
+MAX_POLL_TIMEOUT = 30.0
+# A run that takes longer than this stops the watch, commands that never exit (tail -f, ping -t) can't be watched
+RUN_TIMEOUT = 30.0
+# A watch that nobody polled for this many seconds (or intervals, whichever is longer) is stopped
+IDLE_TIMEOUT = 300.0
+IDLE_INTERVALS = 10
+
+# Cursors are shared by all watches and start from the current time in milliseconds, so a cursor
+# from a stopped watch (or a previous server run) never matches one of a newer watch
+_cursors = itertools.count(int(time.time() * 1000))
+
+class Watch:
+    """
+    Re-runs a command on an interval and keeps the recent outputs, indexed by a cursor
+    that is bumped every time the output changes.
+    """
+    def __init__(self, watch_id: str, command: str, interval: float):
+        self.watch_id = watch_id
+        self.command = command
+        self.interval = interval
+        self.cursor = 0
+        self.exit_code: Optional[int] = None
+        self.snapshots: Dict[int, str] = {} # Maps cursor to the output seen at that cursor
+        self.changed = asyncio.Event() # Set and replaced every time the cursor moves or the watch stops
+        self.stopped = False
+        self.stop_reason: Optional[str] = None
+        self.last_polled = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def output(self) -> str:
+        """The latest output, or an empty string before the first run completes."""
+        return self.snapshots.get(self.cursor, "")
+
+    def is_idle(self) -> bool:
+        """Check if nobody polled the watch for long enough that it should be stopped."""
+        idle_timeout = max(IDLE_TIMEOUT, IDLE_INTERVALS * self.interval)
+        return time.monotonic() - self.last_polled > idle_timeout
+
+    def record(self, exit_code: int, output: str):
+        """
+        Store the result of a run, advancing the cursor only if the output changed.
+        """
+        self.exit_code = exit_code
+        if self.cursor and output == self.output:
+            return
+        self.cursor = next(_cursors)
+        self.snapshots[self.cursor] = output
+        # Drop the oldest snapshots so memory stays bounded for long-running watches
+        while len(self.snapshots) > MAX_SNAPSHOTS:
+            del self.snapshots[next(iter(self.snapshots))]
+        self._notify()
+
+    def stop(self):
+        """
+        Stop re-running the command and wake up any caller waiting for a change.
+        """
+        self.stopped = True
+        self._notify()
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    async def wait_for_change(self, cursor: int, timeout: float) -> bool:
+        """
+        Block until the cursor moves past the given one, the watch stops or the timeout expires.
+        Returns True if the output changed or the watch stopped, False otherwise.
+        """
+        if self.cursor > cursor or self.stopped:
+            return True
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def diff_since(self, cursor: int) -> Tuple[bool, str]:
+        """
+        Return the line-level diff between the output at the given cursor and the latest one.
+
+        Returns:
+            Tuple[bool, str]: A tuple telling whether the body is a diff, and the body itself.
+                              The cursor is unknown (0, already evicted or from another watch)
+                              when it is not a diff, and the full latest output is returned instead.
+        """
+        previous = self.snapshots.get(cursor)
+        if previous is None:
+            return False, self.output
+        if cursor == self.cursor:
+            return True, ""
+        diff = difflib.unified_diff(
+            previous.splitlines(),
+            self.output.splitlines(),
+            fromfile=f"cursor {cursor}",
+            tofile=f"cursor {self.cursor}",
+            n=0,
+            lineterm="",
+        )
+        return True, "\n".join(diff)
+
+    def _notify(self):
+        """Wake up every waiter and arm a fresh event for the next change."""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+class CommandWatcher:
+    """
+    Manages periodic re-execution of commands within sessions.
+    """
+    def __init__(self, executor: "CommandExecutor"):
+        self.executor = executor
+
+    def start_watch(self, command: str, session: "Session", interval: Optional[float] = None) -> Optional[Watch]:
+        """
+        Start watching a command, or return the existing watch for the same command.
+
+        Args:
+            command (str): The command to re-run.
+            session (Session): The session in which the command will run.
+            interval (float, optional): Seconds to wait between the end of a run and the start of the next.
+                                        If None, a new watch uses the default interval and an existing
+                                        watch keeps its own.
+
+        Returns:
+            Watch: The new or existing watch instance, or None if the session already runs too many watches.
+        """
+        if interval is not None:
+            interval = max(interval, MIN_INTERVAL)
+
+        for watch in session.watches.values():
+            if watch.command == command:
+                if interval is not None:
+                    watch.interval = interval
+                return watch
+
+        if len(session.watches) >= MAX_WATCHES_PER_SESSION:
+            logger.warning("Session %s already runs %d watches, not watching '%s'", session.session_id, len(session.watches), command)
+            return None
+
+        watch = Watch(f"watch_{uuid.uuid4().hex[:8]}", command, interval if interval is not None else DEFAULT_INTERVAL)
+        session.watches[watch.watch_id] = watch
+        watch.task = asyncio.create_task(self._run(watch, session))
+        logger.info("Watch %s started for command '%s' in session %s", watch.watch_id, command, session.session_id)
+        return watch
+
+    async def poll(self, watch: Watch, cursor: int, timeout: float) -> Tuple[int, bool, str]:
+        """
+        Return the diff since the caller's cursor, waiting up to the timeout for a change
+        if the caller is already up to date.
+
+        Args:
+            watch (Watch): The watch to poll.
+            cursor (int): The last cursor seen by the caller, 0 for the full output.
+            timeout (float): Seconds to block waiting for a change, capped to MAX_POLL_TIMEOUT.
+                             Ignored until the first run finishes, which is always waited for.
+
+        Returns:
+            Tuple[int, bool, str]: A tuple containing the new cursor, whether the body is a diff
+                                   (False for a full snapshot) and the body.
+        """
+        watch.last_polled = time.monotonic()
+        timeout = min(max(timeout, 0), MAX_POLL_TIMEOUT)
+
+        if watch.cursor == 0:
+            # Always wait for the first run so the caller gets an actual snapshot back
+            await watch.wait_for_change(0, RUN_TIMEOUT)
+        elif cursor == watch.cursor and timeout > 0:
+            await watch.wait_for_change(cursor, timeout)
+
+        is_diff, body = watch.diff_since(cursor)
+        return watch.cursor, is_diff, body
+
+    def stop_watch(self, watch_id: str, session: "Session") -> bool:
+        """
+        Stop a watch and remove it from the session.
+        Returns True if the watch existed, False otherwise.
+        """
+        watch = session.watches.pop(watch_id, None)
+        if not watch:
+            return False
+        watch.stop()
+        logger.info("Watch %s stopped in session %s", watch_id, session.session_id)
+        return True
+
+    async def _run(self, watch: Watch, session: "Session"):
+        """Re-runs the watched command until the watch is stopped or goes idle."""
+        try:
+            while not watch.stopped:
+                if watch.is_idle():
+                    logger.info("Watch %s was not polled recently, stopping it.", watch.watch_id)
+                    watch.stop_reason = "nobody polled it recently"
+                    break
+                run = asyncio.create_task(self.executor.execute_command(watch.command, session))
+                try:
+                    done, _ = await asyncio.wait({run}, timeout=RUN_TIMEOUT)
+                finally:
+                    if not run.done():
+                        run.cancel()
+                # The executor swallows cancellation of a running command, so don't record its result
+                if watch.stopped:
+                    break
+                if not done:
+                    logger.warning("Watch %s: command '%s' did not finish within %ss, stopping it.", watch.watch_id, watch.command, RUN_TIMEOUT)
+                    watch.stop_reason = f"the command did not finish within {RUN_TIMEOUT:g}s, commands that never exit can't be watched"
+                    break
+                exit_code, output = run.result()
+                watch.record(exit_code, output)
+                await asyncio.sleep(watch.interval)
+        except asyncio.CancelledError:
+            logger.debug("Watch %s cancelled.", watch.watch_id)
+            raise
+        finally:
+            if session.watches.get(watch.watch_id) is watch:
+                del session.watches[watch.watch_id]
+            watch.stopped = True
+            watch._notify()
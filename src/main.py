@@ -1,8 +1,10 @@
 import logging
+from typing import Optional
 from mcp.server.fastmcp import FastMCP
 from core.executor import CommandExecutor
 from core.security import SecurityManager
 from core.session import SessionManager
+from core.watcher import CommandWatcher
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,7 @@ security_manager = SecurityManager()
 session_manager = SessionManager()
 
 executor = CommandExecutor()
+watcher = CommandWatcher(executor)
 
 @mcp_server.tool()
 async def execute_command(command: str, session_id: str) -> str:
@@ -80,6 +83,70 @@ async def execute_command(command: str, session_id: str) -> str:
 
     return f"The execution returned with code {exit_code}:\n{output}"
 
+@mcp_server.tool()
+async def watch_command(command: str, session_id: str, cursor: int = 0, interval: Optional[float] = None, timeout: float = 0) -> str:
+    r"""
+    Re-runs a cmd.exe command on an interval in the specified session and returns only the lines that changed since the given cursor.
+    Use this instead of calling execute_command in a loop to poll state (tasklist, sc query, netstat, type of a status file...).
+    Args:
+        command (str): The read-only cmd.exe command to watch. Calling again with the same command in the same session reuses the running watch.
+        session_id (str): The ID of the session to use in order to keep terminal session with environment variables, path etc.
+        cursor (int): The cursor returned by the previous call. Use 0 on the first call to get the full output.
+        interval (float, optional): Seconds to wait between runs of the command. Defaults to 2 seconds for a new watch and leaves an existing watch unchanged.
+        timeout (float): Seconds (up to 30) to block waiting for the output to change when there is nothing new since the cursor. Use 0 to return immediately.
+                         The first call on a new watch always waits (up to 30 seconds) for the first run to finish, whatever the timeout.
+
+    Instruction:
+        Pass the returned cursor back on the next call.
+        The response says whether it holds a "diff" since your cursor or a "full snapshot" (first call, or a cursor the watch no longer knows).
+        Commands that need confirmation (destructive, elevated, package managers) can't be watched, use execute_command for them.
+        Commands that never exit (ping -t, tail -f, kubectl get pods -w) can't be watched either, runs longer than 30 seconds stop the watch.
+        Call stop_watch with the returned watch id when the state no longer needs to be followed, idle watches are stopped after 5 minutes.
+    """
+
+    logger.info(f"Received command to watch: {command} in session: {session_id}")
+    session = session_manager.get_session(session_id)
+    if not session:
+        session = session_manager.create_session(session_id)
+        logger.info(f"New session created: {session_id}")
+
+    # Security check: a confirmation would only cover the first run, not every re-run of the watch
+    if security_manager.needs_confirmation(command):
+        logger.warning(f"Refusing to watch command that needs confirmation: {command}")
+        return "Security check: Commands that need confirmation can't be watched. Use execute_command instead."
+
+    watch = watcher.start_watch(command, session, interval)
+    if not watch:
+        return f"Too many watches in session {session_id}. Call stop_watch on a watch you no longer need."
+
+    new_cursor, is_diff, body = await watcher.poll(watch, cursor, timeout)
+
+    header = f"Watch {watch.watch_id} at cursor {new_cursor} (last exit code {watch.exit_code})"
+    if watch.stopped:
+        header += f", stopped: {watch.stop_reason}" if watch.stop_reason else ", stopped"
+    if new_cursor == 0:
+        return f"{header}: no output yet, poll again with cursor 0."
+    if not is_diff:
+        return f"{header}, full snapshot:\n{body}"
+    if not body:
+        return f"{header}, no change since cursor {cursor}."
+    return f"{header}, diff since cursor {cursor}:\n{body}"
+
+@mcp_server.tool()
+async def stop_watch(watch_id: str, session_id: str) -> str:
+    """
+    Stops a watch started by watch_command.
+    Args:
+        watch_id (str): The ID of the watch returned by watch_command.
+        session_id (str): The ID of the session the watch runs in.
+    """
+
+    session = session_manager.get_session(session_id)
+    if not session or not watcher.stop_watch(watch_id, session):
+        return f"No watch {watch_id} found in session {session_id}."
+
+    return f"Watch {watch_id} stopped."
+
 if __name__ == "__main__":
     # Initialize and run the server
     mcp_server.run(transport='stdio')
\ No newline at end of file
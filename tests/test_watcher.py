@@ -0,0 +1,256 @@
+import sys
+import os
+
+# Adiciona o diretório 'src' ao sys.path para que o teste não dependa das fixtures do conftest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import asyncio
+import pytest
+
+from core import watcher as watcher_module
+from core.watcher import CommandWatcher, Watch, MAX_SNAPSHOTS, MAX_WATCHES_PER_SESSION
+
+
+class FakeSession:
+    """Minimal stand-in for core.session.Session, without the fastapi import."""
+    def __init__(self, session_id: str = "session-watch"):
+        self.session_id = session_id
+        self.watches = {}
+
+
+class HangingExecutor:
+    """Never returns, like tail -f or ping -t, unless cancelled."""
+    def __init__(self):
+        self.cancelled = False
+
+    async def execute_command(self, command, session):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            return -1, "Command execution was cancelled."
+
+
+class FakeExecutor:
+    """Returns queued outputs, repeating the last one, and can block until released."""
+    def __init__(self, *outputs: str):
+        self.outputs = list(outputs)
+        self.runs = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def execute_command(self, command, session):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            # Mirrors CommandExecutor, which swallows cancellation
+            return -1, "Command execution was cancelled."
+        output = self.outputs.pop(0) if len(self.outputs) > 1 else self.outputs[0]
+        return 0, output
+
+
+def test_record_only_advances_on_change():
+    watch = Watch("watch-1", "status", 1.0)
+    watch.record(0, "a\nb")
+    first = watch.cursor
+    watch.record(0, "a\nb")
+    assert watch.cursor == first
+    watch.record(1, "a\nc")
+    assert watch.cursor > first
+    assert watch.exit_code == 1
+
+def test_cursors_are_unique_across_watches():
+    first = Watch("watch-1", "status", 1.0)
+    second = Watch("watch-2", "status", 1.0)
+    first.record(0, "a")
+    second.record(0, "a")
+    assert first.cursor != second.cursor
+    assert second.diff_since(first.cursor) == (False, "a")
+
+def test_diff_since():
+    watch = Watch("watch-1", "status", 1.0)
+    watch.record(0, "a\nb")
+    first = watch.cursor
+    watch.record(0, "a\nc")
+
+    assert watch.diff_since(watch.cursor) == (True, "")
+    is_diff, body = watch.diff_since(first)
+    assert is_diff is True
+    assert "-b" in body and "+c" in body
+    assert "a" not in body.splitlines()
+
+    # Unknown cursors return the full output, marked as a snapshot
+    assert watch.diff_since(0) == (False, "a\nc")
+    assert watch.diff_since(watch.cursor + 1) == (False, "a\nc")
+
+def test_snapshots_are_evicted():
+    watch = Watch("watch-1", "status", 1.0)
+    watch.record(0, "line 0")
+    first = watch.cursor
+    for i in range(1, MAX_SNAPSHOTS + 5):
+        watch.record(0, f"line {i}")
+    assert len(watch.snapshots) == MAX_SNAPSHOTS
+    assert first not in watch.snapshots
+    assert watch.diff_since(first) == (False, f"line {MAX_SNAPSHOTS + 4}")
+
+@pytest.mark.asyncio
+async def test_wait_for_change_timeout_and_wakeup():
+    watch = Watch("watch-1", "status", 1.0)
+    watch.record(0, "a")
+    assert await watch.wait_for_change(watch.cursor, 0.05) is False
+
+    waiter = asyncio.create_task(watch.wait_for_change(watch.cursor, 5))
+    await asyncio.sleep(0)
+    watch.record(0, "b")
+    assert await waiter is True
+
+@pytest.mark.asyncio
+async def test_stop_wakes_waiters():
+    watch = Watch("watch-1", "status", 1.0)
+    watch.record(0, "a")
+    waiter = asyncio.create_task(watch.wait_for_change(watch.cursor, 5))
+    await asyncio.sleep(0)
+    watch.stop()
+    assert await asyncio.wait_for(waiter, 1) is True
+    assert watch.stopped is True
+
+@pytest.mark.asyncio
+async def test_first_poll_waits_for_first_run():
+    session = FakeSession()
+    watcher = CommandWatcher(FakeExecutor("a\nb"))
+    watch = watcher.start_watch("status", session)
+
+    assert await watcher.poll(watch, 0, 0) == (watch.cursor, False, "a\nb")
+    assert watch.cursor != 0
+    assert watch.exit_code == 0
+    watcher.stop_watch(watch.watch_id, session)
+
+@pytest.mark.asyncio
+async def test_poll_blocks_until_change():
+    session = FakeSession()
+    executor = FakeExecutor("a\nb", "a\nb", "a\nc")
+    watcher = CommandWatcher(executor)
+    watch = watcher.start_watch("status", session, 0.1)
+
+    first, is_diff, _ = await watcher.poll(watch, 0, 0)
+    assert is_diff is False
+    cursor, is_diff, body = await watcher.poll(watch, first, 5)
+    assert cursor > first and is_diff is True
+    assert "+c" in body
+    watcher.stop_watch(watch.watch_id, session)
+
+@pytest.mark.asyncio
+async def test_poll_with_cursor_ahead_does_not_block():
+    session = FakeSession()
+    watcher = CommandWatcher(FakeExecutor("a"))
+    watch = watcher.start_watch("status", session, 10)
+    await watcher.poll(watch, 0, 0)
+
+    result = await asyncio.wait_for(watcher.poll(watch, watch.cursor + 42, 20), 1)
+    assert result == (watch.cursor, False, "a")
+    watcher.stop_watch(watch.watch_id, session)
+
+@pytest.mark.asyncio
+async def test_stop_during_run_does_not_record_cancellation():
+    session = FakeSession()
+    executor = FakeExecutor("a")
+    watcher = CommandWatcher(executor)
+    watch = watcher.start_watch("status", session, 0.1)
+    cursor, _, _ = await watcher.poll(watch, 0, 0)
+
+    executor.release.clear()
+    while executor.runs < 2:
+        await asyncio.sleep(0.01)
+    poller = asyncio.create_task(watcher.poll(watch, cursor, 5))
+    await asyncio.sleep(0)
+
+    assert watcher.stop_watch(watch.watch_id, session) is True
+    assert await asyncio.wait_for(poller, 1) == (cursor, True, "")
+    await asyncio.gather(watch.task, return_exceptions=True)
+    assert watch.snapshots == {cursor: "a"}
+    assert session.watches == {}
+    assert watcher.stop_watch(watch.watch_id, session) is False
+
+@pytest.mark.asyncio
+async def test_reuse_keeps_interval_unless_given():
+    session = FakeSession()
+    watcher = CommandWatcher(FakeExecutor("a"))
+    watch = watcher.start_watch("status", session, 30)
+
+    assert watcher.start_watch("status", session) is watch
+    assert watch.interval == 30
+    watcher.start_watch("status", session, 5)
+    assert watch.interval == 5
+    watcher.stop_watch(watch.watch_id, session)
+
+@pytest.mark.asyncio
+async def test_watches_per_session_limit():
+    session = FakeSession()
+    watcher = CommandWatcher(FakeExecutor("a"))
+    watches = [watcher.start_watch(f"status {i}", session, 10) for i in range(MAX_WATCHES_PER_SESSION)]
+
+    assert all(watches)
+    assert watcher.start_watch("one too many", session) is None
+    for watch in watches:
+        watcher.stop_watch(watch.watch_id, session)
+
+@pytest.mark.asyncio
+async def test_idle_watch_is_stopped(monkeypatch):
+    monkeypatch.setattr(watcher_module, "IDLE_TIMEOUT", 0.05)
+    monkeypatch.setattr(watcher_module, "IDLE_INTERVALS", 0)
+    session = FakeSession()
+    watcher = CommandWatcher(FakeExecutor("a"))
+    watch = watcher.start_watch("status", session, 0.1)
+
+    await asyncio.wait_for(watch.task, 1)
+    assert watch.stopped is True
+    assert session.watches == {}
+
+@pytest.mark.asyncio
+async def test_restarted_watch_does_not_match_old_cursor():
+    session = FakeSession()
+    executor = FakeExecutor("pod-a Running")
+    watcher = CommandWatcher(executor)
+    watch = watcher.start_watch("kubectl", session, 10)
+    old_cursor, _, _ = await watcher.poll(watch, 0, 0)
+    watcher.stop_watch(watch.watch_id, session)
+
+    executor.outputs = ["pod-a CrashLoop\npod-b Running"]
+    new_watch = watcher.start_watch("kubectl", session, 10)
+    assert new_watch is not watch
+    cursor, is_diff, body = await watcher.poll(new_watch, old_cursor, 0)
+    assert cursor != old_cursor
+    assert (is_diff, body) == (False, "pod-a CrashLoop\npod-b Running")
+    watcher.stop_watch(new_watch.watch_id, session)
+
+@pytest.mark.asyncio
+async def test_command_that_never_exits_stops_the_watch(monkeypatch):
+    monkeypatch.setattr(watcher_module, "RUN_TIMEOUT", 0.05)
+    session = FakeSession()
+    executor = HangingExecutor()
+    watcher = CommandWatcher(executor)
+    watch = watcher.start_watch("tail -f app.log", session, 0.1)
+
+    assert await asyncio.wait_for(watcher.poll(watch, 0, 0), 1) == (0, False, "")
+    await asyncio.wait_for(watch.task, 1)
+    assert executor.cancelled is True
+    assert watch.stopped is True
+    assert "did not finish" in watch.stop_reason
+    assert watch.snapshots == {}
+    assert session.watches == {}
+
+@pytest.mark.asyncio
+async def test_first_poll_ignores_zero_timeout_until_first_run():
+    session = FakeSession()
+    executor = FakeExecutor("a")
+    executor.release.clear()
+    watcher = CommandWatcher(executor)
+    watch = watcher.start_watch("status", session, 10)
+
+    poller = asyncio.create_task(watcher.poll(watch, 0, 0))
+    await asyncio.sleep(0.05)
+    assert not poller.done()
+    executor.release.set()
+    assert await asyncio.wait_for(poller, 1) == (watch.cursor, False, "a")
+    watcher.stop_watch(watch.watch_id, session)